@@ -78,7 +78,7 @@ def modify_onto():
     # print(list(elem for elem in ontor3.get_elems()[0]))
     ontor3.add_instances(ins)
     # print(list(elem for elem in ontor3.get_elems()[0]))
-    ontor3.add_axioms(ontor.load_csv("./data/class_axioms.csv"))
+    ontor3.add_axioms(ontor.iter_csv("./data/class_axioms.csv"))
     # print(*ontor3.get_axioms()[0], sep="\n")
     ontor3.add_axioms(axs)
 
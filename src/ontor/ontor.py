@@ -32,8 +32,11 @@ import sys
 import textwrap
 import traceback
 
+from collections import Counter, OrderedDict, defaultdict, namedtuple
 from contextlib import contextmanager
-from io import StringIO
+from itertools import chain
+from io import BytesIO, StringIO
+from typing import Iterable, Iterator
 from owlready2 import destroy_entity, get_ontology, onto_path, types,\
                       sync_reasoner_hermit, sync_reasoner_pellet, Thing, Nothing,\
                       AllDisjoint, AllDifferent, DataProperty, ObjectProperty,\
@@ -41,8 +44,12 @@ from owlready2 import destroy_entity, get_ontology, onto_path, types,\
                       FunctionalProperty, InverseFunctionalProperty,\
                       TransitiveProperty, SymmetricProperty, AsymmetricProperty,\
                       ReflexiveProperty, IrreflexiveProperty, ThingClass,\
-                      Not, Inverse
+                      Not, Inverse, OwlReadyOntologyParsingError
+from owlready2.rply import LexingError, ParsingError
 from pyvis.network import Network
+from rdflib import Literal, URIRef, Variable
+from rdflib.query import ResultRow
+from rdflib.namespace import OWL, RDF, RDFS
 
 from . import config
 from . import queries
@@ -51,6 +58,39 @@ logger = logging.getLogger(__name__)
 timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 logging.basicConfig(filename=timestamp+"_om.log", level=logging.DEBUG)
 
+# NOTE: maps the slots set in a dp restriction [dprange, minex, minin, exact, maxin, maxex],
+# encoded as bitmask with slot i as bit i, to the facets of the constrained datatype
+_DP_FACETS = {0b000001: lambda d: {},
+              0b001001: lambda d: {"min_inclusive": d[3], "max_inclusive": d[3]},
+              0b010011: lambda d: {"min_exclusive": d[1], "max_inclusive": d[4]},
+              0b100011: lambda d: {"min_exclusive": d[1], "max_exclusive": d[5]},
+              0b010101: lambda d: {"min_inclusive": d[2], "max_inclusive": d[4]},
+              0b100101: lambda d: {"min_inclusive": d[2], "max_exclusive": d[5]},
+              0b000011: lambda d: {"min_exclusive": d[1]},
+              0b000101: lambda d: {"min_inclusive": d[2]},
+              0b010001: lambda d: {"max_inclusive": d[4]},
+              0b100001: lambda d: {"max_exclusive": d[5]}}
+# NOTE: splits an ntriples line into subject, predicate, and object; objects may contain spaces
+_NT_RE = re.compile(r"^(\S+)\s+(\S+)\s+(.+?)\s*\.\s*$")
+_NT_BRACKETS = str.maketrans("", "", "<>")
+_PELLET_EXPL_RE = re.compile(r"Explanation\(s\): \n(.*?)\n\n", re.DOTALL|re.MULTILINE)
+# NOTE: fixed parts of the plot query; ignored nodes and restrictions are never plotted
+_PLOT_QUERY_SELECT = "SELECT DISTINCT ?s ?p ?o WHERE {\n"
+_PLOT_QUERY_CLASS_RES = ("?s rdfs:subClassOf | owl:equivalentClass ?res . \n"
+                         "?res a owl:Restriction . \n"
+                         "?res owl:onProperty ?p . \n"
+                         "?res owl:onClass | owl:someValuesFrom | owl:allValuesFrom | owl:hasValue ?o . ")
+_PLOT_IGNORED_NODES = ", ".join(["owl:Class", "owl:Thing", "owl:NamedIndividual", "owl:Restriction"])
+_PLOT_QUERY_IGNORE = ("FILTER ( ?s NOT IN (" + _PLOT_IGNORED_NODES + ") && ?o NOT IN (" + _PLOT_IGNORED_NODES +
+                      ") ) . \nFILTER NOT EXISTS {?o a owl:Restriction . }")
+# NOTE: axioms of inconsistent classes to be checked by the user, one list per class and relation
+_PotentialAxioms = namedtuple("_PotentialAxioms", ["is_a", "equivalent_to"])
+# NOTE: shape of the axiom query files - selected variables, where clause, and sort order
+_SPARQL_AXIOMS_RE = re.compile(r"^SELECT DISTINCT (?P<vars>.*?) (?P<where>WHERE\s*\{.*\})\s*"
+                               r"ORDER BY (?P<order>[^{}]*?)\s*\Z", re.DOTALL|re.MULTILINE)
+# NOTE: answers accepted by the CLI; "q" quits instead of returning
+_USER_ANSWERS = {"y": True, "n": False, "q": None}
+
 @contextmanager
 def _redirect_to_log():
     with open(os.devnull, "w") as devnull:
@@ -73,19 +113,36 @@ def _redirect_to_log():
 def _indent_log(info):
     return textwrap.indent(info, '>   ')
 
+def _add_to_onto_path(directory: str) -> None:
+    """ register directory for looking up local ontology files, unless already known
+
+    :param directory: directory to be added to owlready2's onto_path
+    """
+    if directory and directory not in onto_path:
+        onto_path.append(directory)
+
 def load_csv(csv_file: str, load_first_line: bool=False) -> list:
     """ load data from CSV file
+    NOTE: use iter_csv instead if the rows are only iterated over once
 
     :param csv_file: input CSV file
     :param load_first_line: indicates whether content from first row is also returned
     :return: CSV contents as list of lists
     """
+    return list(iter_csv(csv_file, load_first_line))
+
+def iter_csv(csv_file: str, load_first_line: bool=False) -> Iterator[list]:
+    """ stream data from CSV file row by row, e.g., as input for the add methods
+
+    :param csv_file: input CSV file
+    :param load_first_line: indicates whether content from first row is also returned
+    :return: iterator over CSV rows as lists
+    """
     with open(csv_file) as f:
-        if load_first_line:
-            data = list(csv.reader(f))
-        else:
-            data = list(csv.reader(f))[1:]
-    return data
+        reader = csv.reader(f)
+        if not load_first_line:
+            next(reader, None)
+        yield from reader
 
 def load_json(json_file: str) -> dict:
     """ load data from JSON file
@@ -103,6 +160,7 @@ class OntoEditor:
     # NOTE: _prop_types corresponds to owlready2.prop._TYPE_PROPS; defined here to ensure order
     _prop_types = [FunctionalProperty, InverseFunctionalProperty, TransitiveProperty,\
                    SymmetricProperty, AsymmetricProperty, ReflexiveProperty, IrreflexiveProperty]
+    _prop_types_set = frozenset(_prop_types)
     _dp_range_types = {"boolean": bool,
                        "float": float,
                        "integer": int,
@@ -110,6 +168,10 @@ class OntoEditor:
                        "date": datetime.date,
                        "time": datetime.time,
                        "datetime": datetime.datetime}
+    _query_cache_size = 256
+    _axiom_types = ["class", "op", "dp"]
+    # NOTE: combined axioms query, built from the query files on first use
+    _axioms_query: tuple=None
 
     def __init__(self, iri: str, path: str, import_paths: list=None) -> None:
         """ tries to load onto from file specified, creates new file if none is available
@@ -120,16 +182,24 @@ class OntoEditor:
         """
         self.iri = iri
         self.path = path
-        self.filename = path.split(sep="/")[-1]
+        self.filename = path.rpartition("/")[2] or path
         self.query_prefixes = pkg_resources.read_text(queries, 'prefixes.sparql')
-        onto_path.extend(list(set(path.rsplit("/", 1)[0]) - set(onto_path)))
-        if import_paths:
-            onto_path.extend(list(set(import_paths) - set(onto_path)))
+        self._query_header = self.query_prefixes + "PREFIX : <" + self.iri + "#>\n\n"
+        _add_to_onto_path(path.rpartition("/")[0])
+        for import_path in import_paths or []:
+            _add_to_onto_path(import_path)
         self.onto_world = World()
+        self._autosave = True
+        self._rdflib_graph = None
+        self._onto_generation = 0
+        self._query_cache: OrderedDict = OrderedDict()
+        self._snapshot: tuple = (None, None)
+        self._entity_names: dict = {}
+        self._plot_query_bodies: dict = {}
         try:
             self.onto = self.onto_world.get_ontology(self.path).load()
             logger.info("successfully loaded ontology specified")
-        except:
+        except (OSError, OwlReadyOntologyParsingError):
             self.onto = self.onto_world.get_ontology(self.iri)
             self.onto.save(file = self.filename)
             logger.info("ontology file did not exist - created a new one")
@@ -137,23 +207,61 @@ class OntoEditor:
     def _reload_from_file(self) -> None:
         try:
             self.onto = get_ontology(self.path).load()
+            self.invalidate_caches()
             logger.info("successfully reloaded ontology from file")
-        except:
+        except (OSError, OwlReadyOntologyParsingError):
             logger.info("ontology file did not exist")
             sys.exit(1)
 
+    @contextmanager
+    def batch(self):
+        """ defer saving the onto until the end of the block
+        wrapping bulk edits in ``with editor.batch():`` serializes the onto only
+        once instead of once per edit
+
+        :return: the editor itself
+        """
+        autosave = self._autosave
+        self._autosave = False
+        try:
+            yield self
+        finally:
+            self._autosave = autosave
+        # NOTE: only reached if the block succeeded - a failing block is not saved halfway
+        if autosave:
+            self.onto.save(file = self.filename)
+
+    def _save_changes(self) -> None:
+        """ save onto to file, unless saving is deferred by an enclosing batch
+        """
+        self.invalidate_caches()
+        if self._autosave:
+            self.onto.save(file = self.filename)
+
+    def invalidate_caches(self) -> None:
+        """ discard all data derived from the onto, i.e., query results, entity names,
+        plot queries, and the snapshot used for reasoning
+        the editor's methods call this after each modification; it needs to be called
+        manually if the onto is modified directly, e.g., via editor.onto
+        """
+        self._onto_generation += 1
+        self._rdflib_graph = None
+        self._snapshot = (None, None)
+        self._entity_names.clear()
+        self._plot_query_bodies.clear()
+        self._query_cache.clear()
+
     def add_import(self, other_path: str) -> None:
         """ load an additional onto
 
         :param other_path: path to file of onto to be imported
         """
         if "file://" in other_path:
-            onto_path.extend(list(set(other_path.rsplit("/", 1)[0].\
-                             removeprefix("file://")) - set(onto_path)))
+            _add_to_onto_path(other_path.rpartition("/")[0].removeprefix("file://"))
         onto_import = get_ontology(other_path).load()
         with self.onto:
             self.onto.imported_ontologies.append(onto_import)
-        self.onto.save(file = self.filename)
+        self._save_changes()
 
     def save_as(self, new_name: str) -> None:
         """ safe ontology as new file
@@ -162,13 +270,20 @@ class OntoEditor:
         :param new_name: filename with which the onto shall be saved
         """
         self.onto.save(file = new_name)
+        self.invalidate_caches()
         self.filename = new_name
         self.path = "file://./" + new_name
 
+    def _filename_stem(self) -> str:
+        """
+        :return: filename without extension, basis for exported files
+        """
+        return self.filename.rpartition(".")[0] or self.filename
+
     def export_ntriples(self) -> None:
         """ saves with same filename, but as ntriples
         """
-        ntfilename = self.filename.rsplit(".", 1)[0] + ".nt"
+        ntfilename = self._filename_stem() + ".nt"
         self.onto.save(file = ntfilename, format = "ntriples")
 
     def get_elems(self) -> list:
@@ -189,51 +304,117 @@ class OntoEditor:
         :param body: body of the SPARQL query, without prefixes
         :return: complete SPARQL query consisting of prefixes and body
         """
-        gp = self.query_prefixes
-        sp = "PREFIX : <" + self.iri + "#>"
-        b = body
-        return gp + sp + "\n\n" + b
+        return self._query_header + body
 
-    def query_onto(self, query: str) -> list:
+    def query_onto(self, query: str, use_native: bool=False) -> list:
         """ query onto using SPARQL
         NOTE: use of query_owlready messes up ranges of dps
+        NOTE: results are cached until the onto is modified, cf. invalidate_caches
 
         :param query: SPARQL query
+        :param use_native: run query with owlready2's own SPARQL engine, which avoids
+            the rdflib graph view; results then consist of owlready2 entities and
+            Python values instead of rdflib terms; falls back to rdflib for queries
+            the engine does not support
         :return: query results as list
         """
-        with self.onto:
-            graph = self.onto_world.as_rdflib_graph()
-            return list(graph.query(query))
+        key = (self._onto_generation, query, use_native)
+        if key in self._query_cache:
+            self._query_cache.move_to_end(key)
+            return list(self._query_cache[key])
+        results = None
+        if use_native:
+            # NOTE: only translating the query is guarded, errors while running it are not masked
+            try:
+                prepared = self.onto_world.prepare_sparql(query)
+            except (LexingError, ParsingError, ValueError, AttributeError) as exc:
+                logger.warning(f"query not supported by native SPARQL engine, falling back to rdflib: {exc!r}")
+            else:
+                results = list(prepared.execute())
+        if results is None:
+            with self.onto:
+                results = list(self._get_rdflib_graph().query(query))
+        self._query_cache[key] = results
+        if len(self._query_cache) > self._query_cache_size:
+            self._query_cache.popitem(last=False)
+        return list(results)
+
+    def _get_names(self, kind: str) -> list:
+        """ names of the onto's entities of a kind, cached until the onto is modified
+
+        :param kind: "classes", "individuals" or "properties"
+        :return: list of entity names
+        """
+        if kind not in self._entity_names:
+            self._entity_names[kind] = [e.name for e in getattr(self.onto, kind)()]
+        return self._entity_names[kind]
+
+    def _get_rdflib_graph(self):
+        """
+        :return: rdflib view of the onto's world, reused until the onto is modified
+        """
+        if self._rdflib_graph is None:
+            self._rdflib_graph = self.onto_world.as_rdflib_graph()
+        return self._rdflib_graph
 
     def get_axioms(self) -> list:
         """ identify all axioms included in the onto
 
         :return: list of class, op, and dp axioms
         """
-        axioms = []
-        for body in ['class_axioms.sparql', 'op_axioms.sparql', 'dp_axioms.sparql']:
-            query_ax = pkg_resources.read_text(queries, body)
-            axioms.append(self.query_onto(self._build_query(query_ax)))
-        return axioms
-
-    def add_axioms(self, axiom_tuples: list) -> None:
+        query_ax, labels = self._build_axioms_query()
+        axioms: dict={ax_type: [] for ax_type in self._axiom_types}
+        for row in self.query_onto(self._build_query(query_ax)):
+            ax_type = str(row.kind)
+            values = {Variable(label): row[label] for label in labels[ax_type] if row[label] is not None}
+            axioms[ax_type].append(ResultRow(values, [Variable(label) for label in labels[ax_type]]))
+        return [axioms[ax_type] for ax_type in self._axiom_types]
+
+    def _build_axioms_query(self) -> tuple:
+        """ combine the queries for the individual axiom types into a single query
+        NOTE: the variables of the subqueries share columns, which does not affect
+        the results since the branches of a union are not joined
+
+        :return: query body and dict with the variables selected per axiom type
+        """
+        if OntoEditor._axioms_query is not None:
+            return OntoEditor._axioms_query
+        subqueries, labels, order = [], {}, ["?kind"]
+        for ax_type in self._axiom_types:
+            fname = ax_type + "_axioms.sparql"
+            body = pkg_resources.read_text(queries, fname)
+            match = _SPARQL_AXIOMS_RE.search(body)
+            if not match:
+                raise ValueError(f"{fname} does not match 'SELECT DISTINCT ... WHERE {{...}} ORDER BY ...'")
+            order += [v for v in match["order"].split() if v not in order]
+            labels[ax_type] = [v[1:] for v in match["vars"].split()]
+            subqueries.append(body[:match.start("vars")] + '("' + ax_type + '" AS ?kind) ' +\
+                              body[match.start("vars"):match.end("where")])
+        variables = dict.fromkeys(v for ax_type in self._axiom_types for v in labels[ax_type])
+        query_body = "SELECT ?kind ?" + " ?".join(variables) + " WHERE {\n{\n" +\
+                     "\n}\nUNION\n{\n".join(subqueries) + "\n}\n}\nORDER BY " + " ".join(order)
+        OntoEditor._axioms_query = (query_body, labels)
+        return OntoEditor._axioms_query
+
+    def add_axioms(self, axiom_tuples: Iterable) -> None:
         """ add entire axioms to onto
         NOTE: only one axiom may be specified at once
         NOTE: no error handling implemented for input tuples
         NOTE: complex axioms, i.e., intersections and unions, are currently not supported
 
-        :param axiom_tuples: list of tuples of the form [class, superclass, property,
+        :param axiom_tuples: iterable of tuples of the form [class, superclass, property,
             inverted(bool), cardinality type, cardinality, op-object, dp-range,
             dp-min-ex, dp-min-in, dp-exact, dp-max-in, dp-max-ex, negated(bool),
             equivalence(bool)]
         """
+        entities: dict={}
         with self.onto:
             for axiom in axiom_tuples:
                 if axiom[0] and axiom[1] and not axiom[-1]:
-                    my_class = types.new_class(axiom[0], (self.onto[axiom[1]], ))
+                    my_class = types.new_class(axiom[0], (self._get_entity(axiom[1], entities), ))
                 elif axiom[0] and axiom[1] and axiom[-1]:
                     my_class = types.new_class(axiom[0], (Thing, ))
-                    my_class.equivalent_to.append(self.onto[axiom[1]])
+                    my_class.equivalent_to.append(self._get_entity(axiom[1], entities))
                 elif axiom[0] and not axiom[1]:
                     my_class = types.new_class(axiom[0], (Thing, ))
                 else:
@@ -245,12 +426,29 @@ class OntoEditor:
                         current_axioms = my_class.equivalent_to
                     else:
                         current_axioms = my_class.is_a
-                    self._add_restr_to_def(current_axioms, [self.onto[axiom[2]],\
+                    self._add_restr_to_def(current_axioms, [self._get_entity(axiom[2], entities),\
                                            axiom[3], axiom[4], axiom[5], axiom[13]],\
-                                           [self.onto[axiom[6]]], axiom[7:13], axiom)
+                                           [self._get_entity(axiom[6], entities)], axiom[7:13], axiom)
                 else:
                     logger.warning(f"unexpected input: {axiom}")
-        self.onto.save(file = self.filename)
+        self._save_changes()
+
+    def _get_entity(self, name: str, cache: dict):
+        """ look up an entity by name, reusing results of previous lookups
+
+        :param name: name of the entity
+        :param cache: dict with entities resolved so far, only valid for a single edit
+        :return: entity, None if there is no entity with this name
+        """
+        if not name:
+            return None
+        if name not in cache:
+            entity = self.onto[name]
+            # NOTE: misses are not cached, the entity may still be created later on
+            if entity is None:
+                return None
+            cache[name] = entity
+        return cache[name]
 
     def _add_restr_to_def(self, current_axioms: list, resinfo: list, opinfo: list,
                           dpinfo: list, axiom: list) -> None:
@@ -305,109 +503,74 @@ class OntoEditor:
         :return: constrained datatype for DP, set to None if invalid
         """
         dp_range = None
-        if dpres[0] not in list(self._dp_range_types.keys()):
+        if dpres[0] not in self._dp_range_types:
             logger.warning(f"unexpected dp range: {dpres}")
-        if self._check_available_vals(dpres, [0]):
-            dp_range = self._dp_range_types[dpres[0]]
-        elif self._check_available_vals(dpres, [0,3]):
-            dp_range = ConstrainedDatatype(self._dp_range_types[dpres[0]],\
-                                           min_inclusive=dpres[3],\
-                                           max_inclusive=dpres[3])
-        elif self._check_available_vals(dpres, [0,1,4]):
-            dp_range = ConstrainedDatatype(self._dp_range_types[dpres[0]],\
-                                           min_exclusive=dpres[1],\
-                                           max_inclusive=dpres[4])
-        elif self._check_available_vals(dpres, [0,1,5]):
-            dp_range = ConstrainedDatatype(self._dp_range_types[dpres[0]],\
-                                           min_exclusive=dpres[1],\
-                                           max_exclusive=dpres[5])
-        elif self._check_available_vals(dpres, [0,2,4]):
-            dp_range = ConstrainedDatatype(self._dp_range_types[dpres[0]],\
-                                           min_inclusive=dpres[2],\
-                                           max_inclusive=dpres[4])
-        elif self._check_available_vals(dpres, [0,2,5]):
-            dp_range = ConstrainedDatatype(self._dp_range_types[dpres[0]],\
-                                           min_inclusive=dpres[2],\
-                                           max_exclusive=dpres[5])
-        elif self._check_available_vals(dpres, [0,1]):
-            dp_range = ConstrainedDatatype(self._dp_range_types[dpres[0]],\
-                                           min_exclusive=dpres[1])
-        elif self._check_available_vals(dpres, [0,2]):
-            dp_range = ConstrainedDatatype(self._dp_range_types[dpres[0]],\
-                                           min_inclusive=dpres[2])
-        elif self._check_available_vals(dpres, [0,4]):
-            dp_range = ConstrainedDatatype(self._dp_range_types[dpres[0]],\
-                                           max_inclusive=dpres[4])
-        elif self._check_available_vals(dpres, [0,5]):
-            dp_range = ConstrainedDatatype(self._dp_range_types[dpres[0]],\
-                                           max_exclusive=dpres[5])
-        else:
+        mask = sum(1 << i for i, v in enumerate(dpres) if v)
+        if mask not in _DP_FACETS:
             logger.warning(f"unexpected dp range restriction: {dpres}")
+        elif facets := _DP_FACETS[mask](dpres):
+            dp_range = ConstrainedDatatype(self._dp_range_types[dpres[0]], **facets)
+        else:
+            dp_range = self._dp_range_types[dpres[0]]
         return dp_range
 
-    @staticmethod
-    def _check_available_vals(values: list, expected_values: list) -> bool:
-        """
-        :param values: list with values
-        :param expected_values: list with indices of expected values
-        :return: True iff expected indices contain values
-        """
-        indices = [x for x, _ in enumerate(values)]
-        assert all([x in indices for x in expected_values]), "invalid expected_values"
-        test = all([values[i] for i in expected_values]) and\
-               not any([values[i] for i in [e for e in indices if not e in expected_values]])
-        return bool(test)
-
-    def add_ops(self, op_tuples: list) -> None:
+    def add_ops(self, op_tuples: Iterable) -> None:
         """ add object properties including their axioms to onto
         NOTE: only one inverse_prop can be processed per tuple
 
-        :param op_tuples: list of tuples of the form [op, super-op, domain, range,
+        :param op_tuples: iterable of tuples of the form [op, super-op, domain, range,
             functional, inverse functional, transitive, symmetric,
             asymmetric, reflexive, irreflexive, inverse_prop]
         """
+        entities: dict={}
         with self.onto:
             for op in op_tuples:
                 if op[0] and not op[1]:
                     my_op = types.new_class(op[0], (ObjectProperty, ))
                 elif op[0] and op[1]:
-                    my_op = types.new_class(op[0], (self.onto[op[1]], ))
+                    my_op = types.new_class(op[0], (self._get_entity(op[1], entities), ))
                 else:
                     logger.warning(f"unexpected op info: {op}")
                 if op[2]:
-                    my_op.domain.append(self.onto[op[2]])
+                    my_op.domain.append(self._get_entity(op[2], entities))
                 if op[3]:
-                    my_op.range.append(self.onto[op[3]])
+                    my_op.range.append(self._get_entity(op[3], entities))
                 for count, charac in enumerate(op[4:11]):
                     if charac:
                         my_op.is_a.append(self._prop_types[count])
                 if op[-1]:
-                    my_op.inverse_property = self.onto[op[11]]
-        self.onto.save(file = self.filename)
+                    my_op.inverse_property = self._get_entity(op[11], entities)
+        self._save_changes()
 
-    def add_dps(self, dp_tuples: list) -> None:
+    def add_dps(self, dp_tuples: Iterable) -> None:
         """ add datatype properties including their axioms to onto
 
-        :param dp_tuples: list of input tuples of the form [dp, super-dp, functional,
+        :param dp_tuples: iterable of input tuples of the form [dp, super-dp, functional,
             domain, range, minex, minin, exact, maxin, maxex]
         """
+        entities: dict={}
         with self.onto:
             for dp in dp_tuples:
                 try:
                     if dp[0] and not dp[1]:
                         my_dp = types.new_class(dp[0], (DataProperty, ))
                     elif dp[0] and dp[1]:
-                        my_dp = types.new_class(dp[0], (self.onto[dp[1]], ))
-                except:
+                        my_dp = types.new_class(dp[0], (self._get_entity(dp[1], entities), ))
+                    else:
+                        logger.warning(f"unexpected dp info: {dp}")
+                        continue
+                # NOTE: unknown super-dps are looked up as None, which is no valid base
+                except TypeError:
                     logger.warning(f"unexpected dp info: {dp}")
                     continue
                 if dp[2]:
                     my_dp.is_a.append(FunctionalProperty)
                 if dp[3]:
-                    try:
-                        my_dp.domain.append(self.onto[dp[3]])
-                    except:
+                    domain = self._get_entity(dp[3], entities)
+                    if domain is None:
                         logger.warning(f"unexpected dp domain: {dp}")
+                    else:
+                        my_dp.domain.append(domain)
                 if any(dp[4:]):
                     dprange = self._dp_constraint(dp[4:])
                     if dprange:
@@ -415,45 +578,59 @@ class OntoEditor:
                     else:
                         logger.warning(f"unexpected dp range: {dp}")
                         continue
-        self.onto.save(file = self.filename)
+        self._save_changes()
 
-    def add_instances(self, instance_tuples: list) -> None:
+    def add_instances(self, instance_tuples: Iterable) -> None:
         """ add instances and their relations to onto
 
-        :param instance_tuples: list of tuples of the form [instance, class,
+        :param instance_tuples: iterable of tuples of the form [instance, class,
             property, range, range-type]
         """
+        entities: dict={}
+        functional: dict={}
+        # NOTE: relations are grouped by subject and predicate to set them in one go;
+        # op objects are resolved only after all instances have been created
+        relations = defaultdict(list)
+        op_objects = defaultdict(list)
         with self.onto:
             for inst in instance_tuples:
                 if inst[0] and inst[1]:
-                    my_instance = self.onto[inst[1]](inst[0])
+                    my_instance = self._get_entity(inst[1], entities)(inst[0])
                 else:
                     logger.warning(f"unexpected instance info: {inst}")
+                    continue
                 if not any(inst[2:]):
                     continue
                 if inst[2] and inst[3]:
-                    pred = self.onto[inst[2]]
+                    pred = self._get_entity(inst[2], entities)
                     if DataProperty in pred.is_a:
                         if inst[4] and not inst[4] in self._dp_range_types:
                             logger.warning(f"unexpected DP range: {inst}")
                         elif inst[4]:
-                            val = self._dp_range_types[inst[4]](inst[3])
+                            relations[my_instance, pred].append(self._dp_range_types[inst[4]](inst[3]))
                         else:
                             logger.warning(f"DP range undefined - defaulting to string: {inst}")
-                            val = inst[3]
+                            relations[my_instance, pred].append(inst[3])
                     elif ObjectProperty in pred.is_a and not inst[4]:
-                        val = self.onto[inst[3]]
-                    self._add_instance_relation(my_instance, pred, val)
+                        op_objects[my_instance, pred].append(inst[3])
+                    else:
+                        logger.warning(f"unexpected triple: {inst}")
                 else:
                     logger.warning(f"unexpected triple: {inst}")
-        self.onto.save(file = self.filename)
+            for (subj, pred), names in op_objects.items():
+                relations[subj, pred] = [self._get_entity(n, entities) for n in names]
+            for (subj, pred), objs in relations.items():
+                if pred not in functional:
+                    functional[pred] = FunctionalProperty in pred.is_a
+                self._add_instance_relations(subj, pred, objs, functional[pred])
+        self._save_changes()
 
     @staticmethod
-    def _add_instance_relation(subj, pred, obj) -> None:
-        if FunctionalProperty in pred.is_a:
-            setattr(subj, pred.name, obj)
+    def _add_instance_relations(subj, pred, objs: list, is_functional: bool) -> None:
+        if is_functional:
+            setattr(subj, pred.python_name, objs[-1])
         else:
-            getattr(subj, pred.name).append(obj)
+            getattr(subj, pred.python_name).extend(objs)
 
     def add_distinctions(self, distinct_sets: list) -> None:
         """ make classes disjoint and instances distinct
@@ -467,10 +644,15 @@ class OntoEditor:
             for ds in distinct_sets:
                 try:
                     func = funcs[ds[0]]
-                    func([self.onto[elem] for elem in ds[1]])
-                except:
+                except KeyError:
                     logger.warning(f"unknown distinction type {ds[0]}")
-        self.onto.save(file = self.filename)
+                    continue
+                entities = [self.onto[elem] for elem in ds[1]]
+                if not all(entities):
+                    logger.warning(f"missing entity in distinct set {ds[1]}")
+                    continue
+                func(entities)
+        self._save_changes()
 
     def remove_elements(self, elem_list: list) -> None:
         """ remove elements, all their descendents and (in case of classes) instances,
@@ -479,15 +661,20 @@ class OntoEditor:
         :param elem_list: list of elements to be removed from onto
         """
         with self.onto:
+            # NOTE: collecting all entities first ensures that overlapping subtrees
+            # are only walked and destroyed once
+            descendants: set=set()
             for elem in elem_list:
-                for desc in self.onto[elem].descendants():
-                    if Thing in desc.ancestors():
-                        for i in desc.instances():
-                            destroy_entity(i)
-                    if desc != self.onto[elem]:
-                        destroy_entity(desc)
-                destroy_entity(self.onto[elem])
-        self.onto.save(file = self.filename)
+                descendants.update(self.onto[elem].descendants())
+            instances: set=set()
+            for desc in descendants:
+                if Thing in desc.ancestors():
+                    instances.update(desc.instances())
+            for i in instances:
+                destroy_entity(i)
+            for desc in descendants:
+                destroy_entity(desc)
+        self._save_changes()
 
     def remove_from_taxo(self, elem_list: list, reassign: bool=True) -> None:
         """ remove a class from the taxonomy, but keep all subclasses and instances
@@ -499,36 +686,43 @@ class OntoEditor:
         """
         with self.onto:
             for elem in elem_list:
-                parents = list(set(self.onto[elem].ancestors()).intersection(self.onto[elem].is_a))
-                parent = [p for p in parents if not p in self._prop_types]
+                elem_cls = self.onto[elem]
+                ancestors = elem_cls.ancestors()
+                parents = [p for p in elem_cls.is_a if p in ancestors]
+                parent = [p for p in parents if p not in self._prop_types_set]
                 if len(parent) > 1:
                     logger.warning(f"unexpected parent classes: {parents}")
-                descendants = list(self.onto[elem].descendants())
-                descendants.remove(self.onto[elem])
+                descendants = list(elem_cls.descendants())
+                descendants.remove(elem_cls)
                 if reassign:
-                    sc_res = self.get_class_restrictions(self.onto[elem].name, "is_a")
-                    eq_res = self.get_class_restrictions(self.onto[elem].name, "equivalent_to")
+                    sc_res = self.get_class_restrictions(res_type="is_a", entity=elem_cls)
+                    eq_res = self.get_class_restrictions(res_type="equivalent_to", entity=elem_cls)
                 for desc in descendants:
                     desc.is_a.append(parent[0])
                     if reassign:
                         desc.is_a = desc.is_a + sc_res + eq_res
-                destroy_entity(self.onto[elem])
-        self.onto.save(file = self.filename)
+                destroy_entity(elem_cls)
+        self._save_changes()
 
-    def get_class_restrictions(self, class_name: str, res_only: bool=True, res_type: str="is_a") -> list:
+    def get_class_restrictions(self, class_name: str=None, res_only: bool=True, res_type: str="is_a",
+                               entity: ThingClass=None) -> list:
         """ retrieve restrictions on specific class by restriction type
 
         :param class_name: name of the class for which restrictions shall be returned
         :param res_only: only returns Restrictions if set to True, if set to False
             parent class(es) are also included
         :param res_type: restriction type, either is_a or equivalent_to
+        :param entity: class for which restrictions shall be returned, replaces
+            class_name if the class is already at hand
         :return: list of restrictions on class
         """
+        if entity is None:
+            entity = self.onto[class_name]
         with self.onto:
             if res_type == "is_a":
-                elems = self.onto[class_name].is_a
+                elems = entity.is_a
             elif res_type == "equivalent_to":
-                elems = self.onto[class_name].equivalent_to
+                elems = entity.equivalent_to
             else:
                 logger.warning(f"unexpected res_type: {res_type}")
                 sys.exit(1)
@@ -544,7 +738,7 @@ class OntoEditor:
         with self.onto:
             for lst in self.onto[class_name].is_a, self.onto[class_name].equivalent_to:
                 self._remove_restr_from_class_def(lst)
-        self.onto.save(file = self.filename)
+        self._save_changes()
 
     def remove_restrictions_including_prop(self, prop_name: str) -> None:
         """ remove class restrictions that include a certain property
@@ -552,11 +746,30 @@ class OntoEditor:
         :param prop_name: name of the property for which all class restrictions
             shall be removed
         """
+        prop = self.onto[prop_name]
+        if prop is None:
+            logger.warning(f"unknown property - no restrictions removed: {prop_name}")
+            return
         with self.onto:
-            for c in self.onto.classes():
-                for lst in c.is_a, c.equivalent_to:
-                    self._remove_restr_from_class_def(lst, self.onto[prop_name])
-        self.onto.save(file = self.filename)
+            for c in self._get_classes_restricted_by(prop):
+                self._remove_restr_from_class_def(c.is_a, prop)
+                self._remove_restr_from_class_def(c.equivalent_to, prop)
+        self._save_changes()
+
+    def _get_classes_restricted_by(self, prop) -> list:
+        """ identify classes with restrictions on a property via SPARQL rather
+        than checking the restrictions of all classes
+
+        :param prop: property included in the restrictions
+        :return: list of classes
+        """
+        query_body = ("SELECT DISTINCT ?c WHERE {\n"
+                      "?c rdfs:subClassOf | owl:equivalentClass ?res . \n"
+                      "?res owl:onProperty <" + prop.iri + "> . \n"
+                      "FILTER ( isIRI(?c) ) \n}")
+        classes = [self.onto_world[str(row[0])] for row in self.query_onto(self._build_query(query_body))]
+        # NOTE: the query covers the entire world, but only classes of the onto itself are edited
+        return [c for c in classes if c.namespace.ontology is self.onto]
 
     @staticmethod
     def _remove_restr_from_class_def(cls_restrictions, prop=None) -> None:
@@ -565,9 +778,11 @@ class OntoEditor:
         :param cls_restrictions: restrictions on a class, either is_a or equivalent_to
         :param prop: optional; limits results to restrictions including a certain property
         """
-        for r in [r for r in cls_restrictions if isinstance(r, Restriction)]:
-            if not prop or prop and r.property == prop:
-                cls_restrictions.remove(r)
+        keep = [r for r in cls_restrictions if not isinstance(r, Restriction)\
+                or prop and r.property != prop]
+        # NOTE: slice assignment keeps owlready2's list object and thus its change tracking
+        if len(keep) != len(cls_restrictions):
+            cls_restrictions[:] = keep
 
     def reasoning(self, reasoner: str="hermit", save: bool=False, debug: bool=False) -> list:
         """ run reasoner to check consistency and infer new facts
@@ -582,7 +797,7 @@ class OntoEditor:
         # add temporary world for inferences
         inferences = World()
         self._check_reasoner(reasoner)
-        inf_onto = inferences.get_ontology(self.path).load()
+        inf_onto = self._load_snapshot(inferences)
         with inf_onto:
             try:
                 with _redirect_to_log():
@@ -607,6 +822,27 @@ class OntoEditor:
             self._reload_from_file()
         return inconsistent_classes
 
+    def _load_snapshot(self, world: World):
+        """ load the onto's current state into a separate world
+        the onto is serialized once per modification and parsed from memory,
+        which also covers changes not yet saved in a batch
+        NOTE: the onto file is part of the key to also catch direct edits saved
+        without calling invalidate_caches
+
+        :param world: world to load the onto into
+        :return: copy of the onto in world
+        """
+        try:
+            stat = os.stat(self.filename)
+            key = (self._onto_generation, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            key = (self._onto_generation, None, None)
+        if self._snapshot[0] != key:
+            buffer = BytesIO()
+            self.onto.save(file = buffer, format = "ntriples")
+            self._snapshot = (key, buffer.getvalue())
+        return world.get_ontology(self.onto.base_iri).load(fileobj = BytesIO(self._snapshot[1]))
+
     @staticmethod
     def _check_reasoner(reasoner: str) -> None:
         reasoners = ["hermit", "pellet"]
@@ -641,8 +877,7 @@ class OntoEditor:
         :param pellet_traceback: traceback created when running reasoner
         :return: tuple of entire explanation and list of axioms included in explanation
         """
-        rex = re.compile("Explanation\(s\): \n(.*?)\n\n", re.DOTALL|re.MULTILINE)
-        res = set(re.findall(rex, pellet_traceback))
+        res = set(_PELLET_EXPL_RE.findall(pellet_traceback))
         axioms: list=[]
         if res:
             expls = [[l[5:] for l in expl.split("\n")] for expl in res]
@@ -665,21 +900,28 @@ class OntoEditor:
             print(f"Inconsistent classes are: {inconsistent_classes}")
             if self._bool_user_interaction("Show further information?"):
                 debug = World()
-                debug_onto = debug.get_ontology(self.path).load()
+                debug_onto = self._load_snapshot(debug)
                 with debug_onto:
                     sync_reasoner_pellet([debug_onto], infer_property_values=True,\
                                          infer_data_property_values=True, debug=2)
                     # IDEA: further analyze reasoner results to pin down cause of inconsistency
+            # NOTE: inconsistent classes may stem from the reasoning world, hence resolve them in the onto once
+            onto_classes = [self.onto[ic.name] for ic in inconsistent_classes]
             if assume_correct_taxo:
-                pot_probl_ax = {"is_a": self._get_incon_class_res("is_a", inconsistent_classes),
-                                "equivalent_to": self._get_incon_class_res("equivalent_to", inconsistent_classes)}
+                pot_probl_ax = _PotentialAxioms(self._get_incon_class_res("is_a", onto_classes),
+                                                self._get_incon_class_res("equivalent_to", onto_classes))
             else:
-                pot_probl_ax = {"is_a": [self.onto[ic.name].is_a for ic in inconsistent_classes],
-                                "equivalent_to": [self.onto[ic.name].equivalent_to for ic in inconsistent_classes]}
+                pot_probl_ax = _PotentialAxioms([list(c.is_a) for c in onto_classes],
+                                                [list(c.equivalent_to) for c in onto_classes])
             ax_msg = "Potentially inconsistent axiom: "
+            removals = []
             for rel in "is_a", "equivalent_to":
-                self._interactively_delete_axs_by_rel(rel, inconsistent_classes, pot_probl_ax, ax_msg)
-            self.onto.save(file = self.filename)
+                removals += self._interactively_select_axs_by_rel(rel, onto_classes, pot_probl_ax, ax_msg)
+            # NOTE: axioms are removed only once the user went through all of them
+            with self.onto:
+                for ic, rel, ax in removals:
+                    getattr(ic, rel).remove(ax)
+            self._save_changes()
             self.debug_onto(reasoner, assume_correct_taxo)
 
     def _get_incon_class_res(self, restype: str, inconsistent_classes: list) -> list:
@@ -687,50 +929,42 @@ class OntoEditor:
         :param restype: type of class restriction, either is_a or equivalent_to
         :return: list of class restrictions for inconsistent_classes - does not return parent classes
         """
-        return [self.get_class_restrictions(ic.name, res_only=True, res_type=restype) for ic in inconsistent_classes]
+        return [self.get_class_restrictions(res_only=True, res_type=restype, entity=ic) for ic in inconsistent_classes]
 
-    def _interactively_delete_axs_by_rel(self, rel: str, classes: list, axioms: list, msg: str) -> None:
+    def _interactively_select_axs_by_rel(self, rel: str, classes: list, axioms: tuple, msg: str) -> list:
         """
         :param rel: relation between class and axioms - is_a or equivalent_to
-        :param classes: classes for which axioms are to be removed
-        :param axioms: axioms which should be checked for removal
+        :param classes: classes of the onto for which axioms are to be removed
+        :param axioms: axioms per relation which should be checked for removal
         :param msg: message to be displayed when prompting user
+        :return: list of (class, rel, axiom) tuples the user chose to delete
         """
-        for count, ic in enumerate(classes):
-            for ax in axioms[rel][count]:
+        removals = []
+        for ic, class_axioms in zip(classes, getattr(axioms, rel)):
+            for ax in class_axioms:
                 if self._bool_user_interaction("Delete " + rel + " axiom?",\
                                                msg + ic.name + " " + rel + " " + str(ax)):
-                    if isinstance(ax, ThingClass):
-                        getattr(self.onto[ic.name], rel).remove(self.onto[ax.name])
-                    else:
-                        getattr(self.onto[ic.name], rel).remove(ax)
+                    removals.append((ic, rel, ax))
                     # IDEA: instead of simply deleting axioms, also allow user to edit them
+        return removals
 
     @staticmethod
-    def _bool_user_interaction(question: str, info: str=None) -> str:
+    def _bool_user_interaction(question: str, info: str=None) -> bool:
         """ simple CLI for yes/ no/ quit interaction
         """
-        answer = {"y": True,
-                  "n": False}
         if info:
             print(info)
         print(question + " [y(es), n(o), q(uit)]")
-        user_input = input()
-        while user_input not in ["y", "n", "q"]:
+        while (user_input := input()) not in _USER_ANSWERS:
             print("invalid choice, please try again")
-            user_input = input()
-        if user_input in ["y", "n"]:
-            return answer[user_input]
         if user_input == "q":
             print("quitting - process needs to be restarted")
             sys.exit(0)
+        return _USER_ANSWERS[user_input]
 
     @staticmethod
-    def _remove_nt_brackets(triple: list) -> list:
-        for c, _ in enumerate(triple):
-            triple[c] = triple[c].replace('<', '')
-            triple[c] = triple[c].replace('>', '')
-        return triple
+    def _remove_nt_brackets(triple: Iterable) -> tuple:
+        return tuple(t.translate(_NT_BRACKETS) for t in triple)
 
     @staticmethod
     def _df_to_nx_incl_labels(df: pd.DataFrame, coloring: dict) -> nx.MultiDiGraph:
@@ -740,34 +974,55 @@ class OntoEditor:
         :param coloring: dict with colors as keys and lists of nodes as values
         :return: nxgraph for the ontology including labels and coloring
         """
-        nxgraph = nx.from_pandas_edgelist(df, source="subject", target="object",\
-                                          edge_attr="predicate", create_using=nx.MultiDiGraph())
-        # manually set predicates as labels
-        for e in nxgraph.edges.items():
-            e[1]["label"] = e[1].pop("predicate")
+        nxgraph = nx.MultiDiGraph()
+        nxgraph.add_edges_from((s, o, {"label": p}) for s, p, o in
+                               zip(df["subject"], df["predicate"], df["object"]))
         # assert that a node may not have more than one color
-        assert not set(list(coloring.values())[0]).intersection(*list(coloring.values())),\
-            "Several colors specified for one node"
-        for n in nxgraph.nodes.items():
-            for color in coloring.keys():
-                if n[0] in coloring[color]:
-                    n[1]["color"] = color
+        node_counts = Counter(n for nodes in coloring.values() for n in set(nodes))
+        assert all(count == 1 for count in node_counts.values()), "Several colors specified for one node"
+        node_to_color = {n: color for color, nodes in coloring.items() for n in nodes}
+        nx.set_node_attributes(nxgraph, node_to_color, "color")
         return nxgraph
 
-    def _ntriples_to_df(self) -> nx.MultiDiGraph:
+    def _onto_to_df(self) -> pd.DataFrame:
+        """ collect the onto's triples directly from the rdflib view, without an export
+
+        :return: pandas df with spo-triples, terms formatted as in the ntriples export
+        """
+        subjects, predicates, objects = [], [], []
+        for triple in self._get_rdflib_graph().get_context(self.onto):
+            s, p, o = self._remove_nt_brackets(t.n3() for t in triple)
+            subjects.append(s)
+            predicates.append(p)
+            objects.append(o)
+        df = pd.DataFrame({"subject": subjects, "predicate": predicates, "object": objects})
+        return df.drop_duplicates(subset=["subject", "predicate", "object"], ignore_index=True)
+
+    def _ntriples_to_df(self) -> pd.DataFrame:
         self.export_ntriples()
-        f = open(self.filename.rsplit(".", 1)[0] + ".nt", "r")
-        lines = f.readlines()
-        df = pd.DataFrame(columns=["subject", "predicate", "object"])
-        for rownum, row in enumerate(lines):
-            df.loc[rownum] = self._remove_nt_brackets(row.rsplit(".", 1)[0].split(" ")[:3])
-        return df
+        subjects, predicates, objects = [], [], []
+        # NOTE: decoding the whole buffer while reading is cheaper than decoding each term
+        with open(self._filename_stem() + ".nt", "r", encoding="utf-8", buffering=1 << 20) as f:
+            for line in f:
+                match = _NT_RE.match(line)
+                if not match:
+                    continue
+                s, p, o = self._remove_nt_brackets(match.groups())
+                subjects.append(s)
+                predicates.append(p)
+                objects.append(o)
+        df = pd.DataFrame({"subject": subjects, "predicate": predicates, "object": objects})
+        return df.drop_duplicates(subset=["subject", "predicate", "object"], ignore_index=True)
 
     @staticmethod
-    def _query_results_to_df(query_results: list) -> nx.MultiDiGraph:
-        clean_data = [[str(elem).split("#")[-1] for elem in row] for row in query_results]
-        df = pd.DataFrame(clean_data, columns=['subject', 'predicate', 'object'])
-        return df
+    def _query_results_to_df(query_results: list) -> pd.DataFrame:
+        df = pd.DataFrame([[str(elem) for elem in row] for row in query_results],
+                          columns=['subject', 'predicate', 'object'], dtype=object)
+        # NOTE: strip the namespaces column-wise instead of element by element
+        for col in df.columns:
+            df[col] = df[col].str.rsplit("#", n=1).str[-1]
+        # NOTE: stripping the namespaces may turn distinct triples into duplicates
+        return df.drop_duplicates(subset=["subject", "predicate", "object"], ignore_index=True)
 
     def _plot_nxgraph(self, nxgraph: nx.MultiDiGraph, interactive: bool=False) -> None:
         """
@@ -777,10 +1032,36 @@ class OntoEditor:
         """
         net = Network(directed=True, height='100%', width='100%', bgcolor='#222222', font_color='white')
         net.set_options(pkg_resources.read_text(config, 'network_visualization.config'))
-        net.from_nx(nxgraph)
+        self._nx_to_network(nxgraph, net)
         if interactive:
             net.show_buttons()
-        net.show(self.filename.rsplit(".", 1)[0] + ".html")
+        net.show(self._filename_stem() + ".html")
+
+    @staticmethod
+    def _nx_to_network(nxgraph: nx.MultiDiGraph, net: Network) -> None:
+        """ add nodes and edges to a pyvis network like net.from_nx, which adds
+        the end nodes of every edge again and thus repeats its lookups in the list
+        of nodes added so far
+
+        :param nxgraph: networkx graph including the ontology's triples
+        :param net: directed pyvis network to be filled
+        """
+        for node, attrs in nxgraph.nodes(data=True):
+            net.add_node(node, **dict(attrs, size=10))
+        for source, target, attrs in nxgraph.edges(data=True):
+            net.add_edge(source, target, **dict(attrs, weight=1))
+
+    def _get_descendant_names(self, classes: list) -> list:
+        """
+        :param classes: names of classes
+        :return: names of the classes and all their descendants
+        """
+        # NOTE: descendants of classes already covered need not be collected again
+        descendants: set = set()
+        for c in classes or []:
+            if c not in descendants:
+                descendants.update(desc.name for desc in self.onto[c].descendants())
+        return list(descendants)
 
     def _config_plot_query_body(self, classes: list=None, properties: list=None,
                                 focusnode: str=None, radius: int=None, include_class_res: bool=True,
@@ -797,11 +1078,17 @@ class OntoEditor:
         :return: body for SPARQL query
         """
         max_radius = 5
-        nodes_to_be_ignored = ["owl:Class", "owl:Thing", "owl:NamedIndividual", "owl:Restriction"]
+        if focusnode and radius:
+            assert radius <= max_radius, "max radius violated"
+        elif focusnode and not radius or not focusnode and radius:
+            logger.warning("focus: both a focusnode and a radius must be specified - ignoring the focus")
+        key = (tuple(classes or ()), tuple(properties or ()), focusnode, radius,
+               include_class_res, show_class_descendants)
+        if key in self._plot_query_bodies:
+            return self._plot_query_bodies[key]
 
         if show_class_descendants:
-            descendent_lists = [[desc.name for desc in self.onto[c].descendants()] for c in classes]
-            subclasses = list({c for sublist in descendent_lists for c in sublist})
+            subclasses = self._get_descendant_names(classes)
         else:
             subclasses = classes
 
@@ -811,17 +1098,11 @@ class OntoEditor:
             if not sep:
                 sep = ""
             return "FILTER ( ?" + node + " IN (" + ", ".join([sep + v for v in values]) + ") ) . "
-        querypt_class_rels = ("?s rdfs:subClassOf | owl:equivalentClass ?res . \n"
-                              "?res a owl:Restriction . \n"
-                              "?res owl:onProperty ?p . \n"
-                              "?res owl:onClass | owl:someValuesFrom | owl:allValuesFrom | owl:hasValue ?o . ")
-        querypt1 = "SELECT DISTINCT ?s ?p ?o WHERE {\n"
         if include_class_res:
             # NOTE: only atomic axioms are currently supported
-            querypt1 += "{\n?s ?p ?o . \n} UNION {\n" + querypt_class_rels + "\n}"
+            querypt_spo = "{\n?s ?p ?o . \n} UNION {\n" + _PLOT_QUERY_CLASS_RES + "\n}"
         else:
-            querypt1 += "?s ?p ?o . \n"
-        querypt2 = "}"
+            querypt_spo = "?s ?p ?o . \n"
         if properties:
             querypt_rels = _sparql_set_values("p", properties)
         else:
@@ -830,7 +1111,7 @@ class OntoEditor:
             query_nodes_dict: dict={}
             for node in ["s", "o"]:
                 querypt_classes = "?s ?p ?o . \n" + _sparql_set_in(node, subclasses, ":")
-                querypt_class_res = querypt_class_rels + "\n" + _sparql_set_in(node, subclasses, ":")
+                querypt_class_res = _PLOT_QUERY_CLASS_RES + "\n" + _sparql_set_in(node, subclasses, ":")
                 querypt_instances = "{\n?" + node + " a/rdfs:subClassOf* ?" + node +\
                                     "class . \n" + _sparql_set_in(node+"class", classes, ":") +\
                                     "\n} UNION {\n?s ?p ?o . \nFILTER NOT EXISTS {?" + node +\
@@ -844,29 +1125,79 @@ class OntoEditor:
             querypt_nodes = ""
         query_rel_lim = ""
         if focusnode and radius:
-            assert radius <= max_radius, "max radius violated"
-            if properties:
-                rels = properties
-            else:
-                rels = [p.name for p in self.onto.properties()]
-            query_rel_lim = ":" + focusnode + " " + "?/".join(["(rdf:type|rdfs:subClassOf|:" +\
-                                                               "|:".join(rels) + ")"]*radius) + "? ?o . "
-        elif focusnode and not radius or not focusnode and radius:
-            logger.warning("focus: both a focusnode and a radius must be specified - ignoring the focus")
-        querypt_ignore = ""
-        for node in ["s", "o"]:
-            querypt_ignore += "\nMINUS {\n?s ?p ?o . \n" + _sparql_set_in(node, nodes_to_be_ignored) + "\n}"
-        querypt_ignore += "\nMINUS {\n?s ?p ?o . \n ?o a owl:Restriction . \n}"
-        query_body = "\n".join([querypt1, querypt_rels, querypt_nodes, query_rel_lim, querypt_ignore, querypt2])
+            # NOTE: duplicate properties are dropped as each one adds an alternative to every step
+            rels = dict.fromkeys(properties or self._get_names("properties"))
+            step = "(rdf:type|rdfs:subClassOf|:" + "|:".join(rels) + ")"
+            query_rel_lim = ":" + focusnode + " " + "?/".join([step]*radius) + "? ?o . "
+        # NOTE: the most selective patterns come first to keep intermediate results small
+        query_body = "\n".join([_PLOT_QUERY_SELECT, querypt_rels, query_rel_lim, querypt_nodes, querypt_spo,
+                                _PLOT_QUERY_IGNORE, "}"])
+        self._plot_query_bodies[key] = query_body
         return query_body
 
-    def visualize(self, classes: list=None, properties: list=None, focusnode: str=None, radius: int=None) -> None:
+    def _get_class_plot_triples(self, classes: list) -> list:
+        """ select the same triples as the plot query for classes only, but in a
+        single pass over the rdflib view instead of evaluating the nested unions
+
+        a triple is plotted if both its subject and object are either one of the
+        classes or their descendants, an instance thereof, or - for asserted
+        triples only - a node without type and parent, e.g., a literal
+
+        :param classes: classes to be returned including their instances
+        :return: list of spo-triples
+        """
+        graph = self._get_rdflib_graph()
+        plotted_classes = {URIRef(self.iri + "#" + c) for c in self._get_descendant_names(classes)}
+        # NOTE: like the query's property path, instances are found via rdfs:subClassOf only
+        instance_classes = {URIRef(self.iri + "#" + c) for c in classes}
+        stack = list(instance_classes)
+        while stack:
+            for sub in graph.subjects(RDFS.subClassOf, stack.pop()):
+                if sub not in instance_classes:
+                    instance_classes.add(sub)
+                    stack.append(sub)
+        plotted_nodes = plotted_classes.union(*(graph.subjects(RDF.type, c) for c in instance_classes))
+        untyped: dict = {}
+
+        def _is_plotted(node, asserted):
+            if node in plotted_nodes:
+                return True
+            if not asserted:
+                return False
+            if node not in untyped:
+                untyped[node] = isinstance(node, Literal) or\
+                                (next(graph.objects(node, RDF.type), None) is None and
+                                 next(graph.objects(node, RDFS.subClassOf), None) is None)
+            return untyped[node]
+
+        # simplified triples for class restrictions, see _PLOT_QUERY_CLASS_RES
+        class_res = set()
+        for rel in RDFS.subClassOf, OWL.equivalentClass:
+            for s, res in graph.subject_objects(rel):
+                if (res, RDF.type, OWL.Restriction) in graph:
+                    for p in graph.objects(res, OWL.onProperty):
+                        for value_rel in OWL.onClass, OWL.someValuesFrom, OWL.allValuesFrom, OWL.hasValue:
+                            class_res.update((s, p, o) for o in graph.objects(res, value_rel))
+        ignored = {OWL.Class, OWL.Thing, OWL.NamedIndividual, OWL.Restriction}
+        triples = set()
+        for (s, p, o), asserted in chain(((t, True) for t in graph.triples((None, None, None))),
+                                         ((t, t in graph) for t in class_res)):
+            if s in ignored or o in ignored or not _is_plotted(s, asserted) or not _is_plotted(o, asserted):
+                continue
+            if (o, RDF.type, OWL.Restriction) not in graph:
+                triples.add((s, p, o))
+        return list(triples)
+
+    def visualize(self, classes: list=None, properties: list=None, focusnode: str=None, radius: int=None,
+                  from_export: bool=False) -> None:
         """ visualize onto as a graph; generates html
 
         :param classes: list of classes to be included in plot
         :param properties: list of properties to be included in plot
         :param radius: maximum number of relations between a node and a node of
             one of the classes specified
+        :param from_export: when plotting the entire onto, read its triples from an
+            ntriples export written next to the onto file instead of from memory
         :return: None
         """
 
@@ -874,11 +1205,16 @@ class OntoEditor:
         classcolor = "#0065bd"
         instancecolor = "#98c6ea"
         coloring = {}
-        coloring[classcolor] = [c.name for c in self.onto.classes()]
-        coloring[instancecolor] = [i.name for i in self.onto.individuals()]
+        coloring[classcolor] = self._get_names("classes")
+        coloring[instancecolor] = self._get_names("individuals")
 
         if not classes and not properties and not focusnode and not radius:
-            graphdata = self._ntriples_to_df()
+            if from_export:
+                graphdata = self._ntriples_to_df()
+            else:
+                graphdata = self._onto_to_df()
+        elif classes and not properties and not focusnode and not radius:
+            graphdata = self._query_results_to_df(self._get_class_plot_triples(classes))
         else:
             query_body = self._config_plot_query_body(classes, properties, focusnode, radius)
             query_results = self.query_onto(self._build_query(query_body))
@@ -1,6 +1,10 @@
+import csv
 import os
+import tempfile
 import unittest
+import networkx as nx
 import owlready2 as owl2
+from pyvis.network import Network
 
 import ontor
 
@@ -51,9 +55,226 @@ class TestCore(unittest.TestCase):
 
         self.assertEqual(len(list(ontor1.onto.individuals())), 2)
 
+        # axioms are returned as result rows with the variables of the individual queries
+        class_axioms, op_axioms, dp_axioms = ontor1.get_axioms()
+        self.assertIn(("vegetarian", "human"),
+                      [(str(r["class"]).split("#")[-1], str(r.eq).split("#")[-1]) for r in class_axioms])
+        self.assertEqual([str(r.op).split("#")[-1] for r in op_axioms], ["likes"])
+        self.assertEqual(sorted(str(r.asdict()["dp"]).split("#")[-1] for r in dp_axioms),
+                         ["description", "diameter_in_cm", "weight_in_grams"])
+
         self.assertTrue(os.path.isfile(fname))
         ensure_file_absent(fname)
 
+    def test_batch(self):
+        iri = "http://example.org/onto-batch.owl"
+        fname = "./onto-batch.owl"
+        ensure_file_absent(fname)
+
+        ontor1 = ontor.OntoEditor(iri, fname)
+        with ontor1.batch():
+            ontor1.add_axioms([["food", None, None, None, None, None, None],
+                               ["pizza", "food", None, None, None, None, None]])
+            with open(fname) as f:
+                self.assertNotIn("pizza", f.read())
+        with open(fname) as f:
+            self.assertIn("pizza", f.read())
+        ensure_file_absent(fname)
+
+    def test_batch_exception(self):
+        iri = "http://example.org/onto-batch-exc.owl"
+        fname = "./onto-batch-exc.owl"
+        ensure_file_absent(fname)
+
+        ontor1 = ontor.OntoEditor(iri, fname)
+        with self.assertRaises(RuntimeError):
+            with ontor1.batch():
+                ontor1.add_axioms([["food", None, None, None, None, None, None]])
+                raise RuntimeError("edit failed")
+        # a failing batch is not written to file, but later edits are saved again
+        with open(fname) as f:
+            self.assertNotIn("food", f.read())
+        ontor1.add_axioms([["pizza", None, None, None, None, None, None]])
+        with open(fname) as f:
+            self.assertIn("pizza", f.read())
+        ensure_file_absent(fname)
+
+    def test_query_cache(self):
+        iri = "http://example.org/onto-query.owl"
+        fname = "./onto-query.owl"
+        ensure_file_absent(fname)
+
+        ontor1 = ontor.OntoEditor(iri, fname)
+        query = ontor1._build_query("SELECT ?c WHERE { ?c a owl:Class . }")
+        ontor1.add_axioms([["food", None, None, None, None, None, None]])
+        self.assertEqual(len(ontor1.query_onto(query)), 1)
+        self.assertEqual(len(ontor1.query_onto(query)), 1)
+        # modifications invalidate cached results
+        ontor1.add_axioms([["pizza", "food", None, None, None, None, None]])
+        self.assertEqual(len(ontor1.query_onto(query)), 2)
+        # direct modifications require invalidating the caches explicitly
+        with ontor1.onto:
+            owl2.types.new_class("pizza_base", (owl2.Thing, ))
+        self.assertEqual(len(ontor1.query_onto(query)), 2)
+        ontor1.invalidate_caches()
+        self.assertEqual(len(ontor1.query_onto(query)), 3)
+        # owlready2's engine runs supported queries, others fall back to rdflib
+        self.assertEqual(len(ontor1.query_onto(query, use_native=True)), 3)
+        query_ax = ontor1._build_query(ontor1._build_axioms_query()[0])
+        with self.assertLogs("ontor.ontor", level="WARNING"):
+            self.assertEqual(len(ontor1.query_onto(query_ax, use_native=True)), len(ontor1.query_onto(query_ax)))
+        # the combined axioms query is built once; query files need an explicit sort order
+        self.assertIs(ontor1._build_axioms_query(), ontor1._build_axioms_query())
+        self.assertIsNone(ontor.ontor._SPARQL_AXIOMS_RE.search("SELECT DISTINCT ?c WHERE { ?c a owl:Class . }"))
+        ensure_file_absent(fname)
+
+    def test_add_instances(self):
+        fname = "./onto-instances.owl"
+        ensure_file_absent(fname)
+
+        ontor1 = ontor.OntoEditor("http://example.org/onto-instances.owl", fname)
+        ontor1.add_axioms([["human", None, None, None, None, None, None],
+                           ["pizza", None, None, None, None, None, None]])
+        ontor1.add_ops([["likes", None, "human", None, False, False, False, False, False, False, False, None]])
+        ontor1.add_dps([["diameter_in_cm", None, True, "pizza", "integer", None, None, None, None, None]])
+        ontor1.add_instances([["John", "human", "likes", "His_pizza", None],
+                              ["His_pizza", "pizza", "diameter_in_cm", "30", "integer"],
+                              ["His_pizza", "pizza", "diameter_in_cm", "32", "integer"],
+                              ["Ghost", None, "likes", "His_pizza", None],
+                              ["Jane", "human", "likes", "His_pizza", "integer"]])
+        onto = ontor1.onto
+        # op objects may be defined by later tuples
+        self.assertEqual(onto.John.likes, [onto.His_pizza])
+        # the last value of a functional property wins
+        self.assertEqual(onto.His_pizza.diameter_in_cm, 32)
+        # tuples without class or with an invalid range type are skipped
+        self.assertIsNone(onto.Ghost)
+        self.assertEqual(onto.Jane.likes, [])
+        ensure_file_absent(fname)
+
+    def test_remove_restrictions_including_prop(self):
+        fname = "./onto-restrictions.owl"
+        ensure_file_absent(fname)
+
+        ontor1 = ontor.OntoEditor("http://example.org/onto-restrictions.owl", fname)
+        ontor1.add_axioms([["human", None, None, None, None, None, None],
+                           ["food", None, None, None, None, None, None]])
+        ontor1.add_ops([["likes", None, "human", None, False, False, False, False, False, False, False, None],
+                        ["eats", None, "human", None, False, False, False, False, False, False, False, None]])
+        ontor1.add_axioms([["human", None, "likes", None, "some", None, "food", None, None, None, None, None, None, None, False],
+                           ["human", None, "eats", None, "some", None, "food", None, None, None, None, None, None, None, False]])
+        # unknown properties leave all restrictions untouched
+        ontor1.remove_restrictions_including_prop("typo_likes")
+        self.assertEqual(len(ontor1.get_class_restrictions("human")), 2)
+        # classes of other ontos in the same world are left untouched
+        other_onto = ontor1.onto_world.get_ontology("http://example.org/onto-other.owl")
+        with other_onto:
+            robot = owl2.types.new_class("robot", (owl2.Thing, ))
+            robot.is_a.append(ontor1.onto.likes.some(ontor1.onto.food))
+        ontor1.remove_restrictions_including_prop("likes")
+        self.assertEqual([r.property for r in ontor1.get_class_restrictions("human")], [ontor1.onto.eats])
+        self.assertEqual(len(robot.is_a), 2)
+        ensure_file_absent(fname)
+
+    def test_remove_from_taxo(self):
+        fname = "./onto-taxo.owl"
+        ensure_file_absent(fname)
+
+        ontor1 = ontor.OntoEditor("http://example.org/onto-taxo.owl", fname)
+        ontor1.add_axioms([["food", None, None, None, None, None, None],
+                           ["pizza", "food", None, None, None, None, None],
+                           ["pizza_base", None, None, None, None, None, None],
+                           ["thin_crust_pizza", "pizza", None, None, None, None, None]])
+        ontor1.add_ops([["has_base", None, "pizza", None, False, False, False, False, False, False, False, None]])
+        ontor1.add_axioms([["pizza", None, "has_base", None, "some", None, "pizza_base", None, None, None, None, None, None, None, False],
+                           ["pizza", None, "has_base", None, "only", None, "pizza_base", None, None, None, None, None, None, None, True]])
+        onto = ontor1.onto
+        ontor1.remove_from_taxo(["pizza"], reassign=True)
+        # both the is_a and the equivalent_to restriction are reassigned once
+        self.assertCountEqual(onto.thin_crust_pizza.is_a, [onto.food,
+                                                          onto.has_base.some(onto.pizza_base),
+                                                          onto.has_base.only(onto.pizza_base)])
+        ensure_file_absent(fname)
+
+    def test_snapshot(self):
+        fname = "./onto-snapshot.owl"
+        ensure_file_absent(fname)
+
+        ontor1 = ontor.OntoEditor("http://example.org/onto-snapshot.owl", fname)
+        ontor1.add_axioms([["food", None, None, None, None, None, None]])
+        self.assertIsNone(ontor1._load_snapshot(owl2.World())["pizza"])
+        # direct modifications are picked up once they are saved
+        with ontor1.onto:
+            owl2.types.new_class("pizza", (ontor1.onto.food, ))
+        ontor1.onto.save(file=fname)
+        self.assertIsNotNone(ontor1._load_snapshot(owl2.World())["pizza"])
+        ensure_file_absent(fname)
+
+    def test_dp_constraint(self):
+        fname = "./onto-dp.owl"
+        ensure_file_absent(fname)
+
+        ontor1 = ontor.OntoEditor("http://example.org/onto-dp.owl", fname)
+        self.assertIs(ontor1._dp_constraint(["integer", None, None, None, None, None]), int)
+        exact = ontor1._dp_constraint(["integer", None, None, 3, None, None])
+        self.assertEqual((exact.min_inclusive, exact.max_inclusive), (3, 3))
+        interval = ontor1._dp_constraint(["float", 1, None, None, None, 10])
+        self.assertEqual((interval.min_exclusive, interval.max_exclusive), (1, 10))
+        # exact value and interval cannot be combined
+        self.assertIsNone(ontor1._dp_constraint(["integer", 1, None, 3, None, None]))
+        # unknown domains are reported instead of being added as None
+        with self.assertLogs("ontor.ontor", level="WARNING"):
+            ontor1.add_dps([["weight", None, False, "typo_food", "float", None, None, None, None, None]])
+        self.assertEqual(ontor1.onto.weight.domain, [])
+        ensure_file_absent(fname)
+
+    def test_class_plot_triples(self):
+        fname = "./onto-plot.owl"
+        ensure_file_absent(fname)
+
+        ontor1 = ontor.OntoEditor("http://example.org/onto-plot.owl", fname)
+        ontor1.add_axioms([["human", None, None, None, None, None, None],
+                           ["food", None, None, None, None, None, None],
+                           ["pizza", "food", None, None, None, None, None],
+                           ["margherita", "pizza", None, None, None, None, None]])
+        ontor1.add_ops([["likes", None, "human", None, False, False, False, False, False, False, False, None]])
+        ontor1.add_dps([["diameter_in_cm", None, True, "pizza", "integer", None, None, None, None, None]])
+        ontor1.add_axioms([["human", None, "likes", None, "some", None, "food", None, None, None, None, None, None, None, False]])
+        ontor1.add_instances([["John", "human", "likes", "His_pizza", None],
+                              ["His_pizza", "margherita", "diameter_in_cm", "32", "integer"]])
+        for classes in ["pizza"], ["human", "pizza"]:
+            query = ontor1._build_query(ontor1._config_plot_query_body(classes))
+            expected = {tuple(map(str, row)) for row in ontor1.query_onto(query)}
+            triples = {tuple(map(str, row)) for row in ontor1._get_class_plot_triples(classes)}
+            self.assertTrue(expected)
+            self.assertEqual(triples, expected)
+        ensure_file_absent(fname)
+
+    def test_nx_to_network(self):
+        nxgraph = nx.MultiDiGraph()
+        nxgraph.add_edges_from([("John", "His_pizza", {"label": "likes"}),
+                                ("John", "human", {"label": "type"}),
+                                ("His_pizza", "human", {"label": "type"})])
+        expected = Network(directed=True, font_color="white")
+        expected.from_nx(nxgraph)
+        net = Network(directed=True, font_color="white")
+        ontor.OntoEditor._nx_to_network(nxgraph, net)
+        self.assertCountEqual(net.nodes, expected.nodes)
+        self.assertCountEqual(net.edges, expected.edges)
+
+    def test_load_csv(self):
+        # ragged and blank rows are returned as they are
+        rows = [["margherita", "pizza", "has_topping", "", "some", "", "cheese_topping"],
+                ["cheese_topping", "pizza_topping"], [],
+                ["margherita", "pizza", "", "", "", "", "", "", "", "", "", "", "", "", "True"]]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir, "axioms.csv")
+            with open(fname, "w", newline="") as f:
+                csv.writer(f).writerows([["class", "superclass"] + [""] * 5] + rows)
+            self.assertEqual(ontor.load_csv(fname), rows)
+            self.assertEqual(list(ontor.iter_csv(fname)), rows)
+            self.assertEqual(len(ontor.load_csv(fname, load_first_line=True)), len(rows) + 1)
+
 
 # #############################################################################
 #                    Auxiliary Functions for Unittests